@@ -0,0 +1,79 @@
+// Este archivo contiene el elemento del navegador que dibuja la cuadrícula de la visualización de la ciudad.
+// Recibe de DirtyCanvasGrid (canvas3.py) la capa estática una sola vez y después solo las celdas que
+// cambiaron; cada celda se borra y se vuelve a pintar sin tocar el resto del canvas.
+// Autores:
+//       A01749581 Mariana Balderrábano Aguilar
+//       A01749898 Jennyfer Nahomi Jasso Hernández
+//       A01750338 Min Che Kim
+//       A01750911 Yael Michel García López
+// Fecha de creación: 19/10/2026
+// Última modificación: 19/10/2026
+
+const DeltaCanvasModule = function (canvasWidth, canvasHeight, gridWidth, gridHeight) {
+  // Dos canvas encimados: abajo la capa estática y arriba las celdas que cambian
+  const container = document.createElement("div");
+  Object.assign(container.style, { position: "relative", width: canvasWidth + "px", height: canvasHeight + "px" });
+  const createCanvas = function () {
+    const canvas = document.createElement("canvas");
+    Object.assign(canvas, { width: canvasWidth, height: canvasHeight });
+    Object.assign(canvas.style, { position: "absolute", left: "0", top: "0", border: "1px dotted" });
+    container.appendChild(canvas);
+    return canvas.getContext("2d");
+  };
+  const staticContext = createCanvas();
+  const context = createCanvas();
+  document.getElementById("elements").appendChild(container);
+
+  const cellWidth = canvasWidth / gridWidth;
+  const cellHeight = canvasHeight / gridHeight;
+  // Dibujos de cada celda dinámica ("x,y" -> lista de dibujos)
+  let cells = {};
+
+  // La celda (0, 0) está abajo a la izquierda, como en CanvasGrid
+  const drawPortrayal = function (ctx, portrayal) {
+    const left = portrayal.x * cellWidth;
+    const top = (gridHeight - portrayal.y - 1) * cellHeight;
+    ctx.fillStyle = portrayal.Color;
+    ctx.strokeStyle = portrayal.Color;
+    if (portrayal.Shape === "circle") {
+      const radius = portrayal.r * (Math.min(cellWidth, cellHeight) / 2 - 1);
+      ctx.beginPath();
+      ctx.arc(left + cellWidth / 2, top + cellHeight / 2, radius, 0, 2 * Math.PI);
+      if (portrayal.Filled === "true") ctx.fill();
+      else ctx.stroke();
+    } else {
+      const width = portrayal.w * cellWidth;
+      const height = portrayal.h * cellHeight;
+      const x = left + (cellWidth - width) / 2;
+      const y = top + (cellHeight - height) / 2;
+      if (portrayal.Filled === "true") ctx.fillRect(x, y, width, height);
+      else ctx.strokeRect(x, y, width, height);
+    }
+  };
+
+  const drawCell = function (key) {
+    const [x, y] = key.split(",").map(Number);
+    context.clearRect(x * cellWidth, (gridHeight - y - 1) * cellHeight, cellWidth, cellHeight);
+    const portrayals = (cells[key] || []).slice().sort((a, b) => a.Layer - b.Layer);
+    for (const portrayal of portrayals) drawPortrayal(context, portrayal);
+  };
+
+  this.render = function (data) {
+    if (data.reset) {
+      this.reset();
+      const layers = data.static.slice().sort((a, b) => a.Layer - b.Layer);
+      for (const portrayal of layers) drawPortrayal(staticContext, portrayal);
+    }
+    for (const key in data.cells) {
+      if (data.cells[key].length > 0) cells[key] = data.cells[key];
+      else delete cells[key];
+      drawCell(key);
+    }
+  };
+
+  this.reset = function () {
+    staticContext.clearRect(0, 0, canvasWidth, canvasHeight);
+    context.clearRect(0, 0, canvasWidth, canvasHeight);
+    cells = {};
+  };
+};
@@ -5,9 +5,11 @@
 #       A01750338 Min Che Kim				
 #       A01750911 Yael Michel García López		
 # Fecha de creación: 14/11/2024
-# Última modificación: 22/11/2024
+# Última modificación: 19/10/2026
 
-import mesa, heapq
+import mesa
+from collections import deque
+from graph3 import shortestPath
 
 class Parking(mesa.Agent):
     """Clase que representa un estacionamiento"""
@@ -25,22 +27,53 @@ class Parking(mesa.Agent):
         self.pos = pos
         self.capacity = capacity
         self.currentCars = 0
+        # Lugares apartados: id del auto -> paso en el que vence la reservación
+        self.reserved = {}
+        # Autos que esperan un lugar en este estacionamiento
+        self.waitlist = deque()
+
+    def freeSlots(self):
+        """Regresa el número de lugares que no están ocupados ni apartados"""
+        return self.capacity - self.currentCars - len(self.reserved)
     
-    def addCar(self):
-        """Añade un coche al estacionamienro si hay espacio disponible"""
-        if self.currentCars < self.capacity:
+    def addCar(self, car=None):
+        """
+        Añade un coche al estacionamienro si hay espacio disponible.
+        Si el coche tiene una reservación aquí, ocupa el lugar que tenía apartado.
+
+        Params:
+            car (Car): El coche que llega (opcional).
+
+        Returns:
+            bool: True si el coche pudo estacionarse.
+        """
+        if car is not None and self.reserved.pop(car.unique_id, None) is not None:
+            self.currentCars += 1
+        elif self.freeSlots() > 0:
             self.currentCars += 1
-            return True
-        return False
+        else:
+            return False
+        self.model.parkingChanged(self)
+        return True
     
+    def departingCars(self):
+        """Regresa el número de autos contados en el estacionamiento que ya tienen viaje y van a salir"""
+        return sum(1 for agent in self.model.grid.get_cell_list_contents([self.pos])
+                   if isinstance(agent, Car) and not agent.left)
+
+    def idleCars(self):
+        """Regresa el número de autos estacionados que no tienen un viaje pendiente de salir"""
+        return self.currentCars - self.departingCars()
+
     def removeCar(self):
         """Disminuye el cupo (capacidad) cuando el carro sale del estacionamiento"""
         if self.currentCars > 0:
             self.currentCars -= 1
+            self.model.parkingChanged(self)
 
 class TrafficLight(mesa.Agent):
     """Clase que representa un semáforo"""
-    def __init__(self, uniqueId, model, pos, initialState) -> None:
+    def __init__(self, uniqueId, model, pos, initialState, greenTime=5, yellowTime=2, redTime=5, offset=0) -> None:
         """
         Agente que representa un semáforo
         
@@ -49,25 +82,37 @@ class TrafficLight(mesa.Agent):
             model (CityModel): El modelo al que pertenece el agente.
             pos (tuple): La posición del semáforo en la cuadrícula.
             initialState (str): El estado inicial del semáforo.
+            greenTime (int): Pasos que dura la luz verde.
+            yellowTime (int): Pasos que dura la luz amarilla.
+            redTime (int): Pasos que dura la luz roja.
+            offset (int): Pasos que se adelanta el ciclo del semáforo al iniciar.
         """
         super().__init__(uniqueId, model)
         self.pos = pos
         self.state = initialState
         self.step_count = -1
+        self.greenTime = greenTime
+        self.yellowTime = yellowTime
+        self.redTime = redTime
+        for _ in range(offset):
+            self.changeState()
 
     def changeState(self):
         """Cambia el estado del semáforo"""        
         self.step_count += 1
         
-        if self.state == "green" and self.step_count >= 5:
+        if self.state == "green" and self.step_count >= self.greenTime:
             self.state = "yellow"
             self.step_count = 0
-        elif self.state == "yellow" and self.step_count >= 2:
+        elif self.state == "yellow" and self.step_count >= self.yellowTime:
             self.state = "red"
             self.step_count = 0
-        elif self.state == "red" and self.step_count >= 5:
+        elif self.state == "red" and self.step_count >= self.redTime:
             self.state = "green"
             self.step_count = 0
+        else:
+            return
+        self.model.dirtyCells.add(self.pos)
 
 class Car(mesa.Agent):
     """
@@ -85,112 +130,161 @@ class Car(mesa.Agent):
             parkingDest (tuple): La posición de destino del auto (estacionamiento de destino).
         """
         super().__init__(unique_id, model)
-        self.now = parkingNow
-        self.dest = parkingDest
+        self.reset(unique_id, parkingNow, parkingDest)
+
+    def reset(self, unique_id, parkingNow, parkingDest):
+        """
+        Prepara el auto para un nuevo viaje. Se usa al crearlo y al reciclarlo desde el pool de la demanda.
+
+        Params:
+            unique_id (int): Identificador único del auto para este viaje.
+            parkingNow (tuple): La posición inicial del auto (estacionamiento de origen).
+            parkingDest (tuple): La posición de destino del auto (estacionamiento de destino).
+        """
+        self.unique_id = unique_id
+        # El lugar en el destino lo aparta el modelo (ver CityModel.admitCar)
+        self.setTrip(parkingNow, parkingDest)
         self.pos = self.now
-        self.path = self.calculatePath(self.now, self.dest, model.directions)
+        self.reservation = None
         self.left = False
+        self.waiting = False
+        # Al estacionarse el auto sale de la cuadrícula: pos y path quedan en None
+        self.parked = False
+
+    def setTrip(self, parkingNow, parkingDest):
+        """
+        Cambia el origen y el destino del viaje y descarta la ruta anterior. Se hace con el candado de
+        rutas para que un cálculo en segundo plano no guarde la ruta del viaje anterior.
+
+        Params:
+            parkingNow (tuple): La posición de origen del viaje.
+            parkingDest (tuple): La posición de destino del viaje.
+        """
+        with self.model.pathLock:
+            self.now = parkingNow
+            self.dest = parkingDest
+            # La ruta se calcula la primera vez que se usa (o en segundo plano, ver CityModel.precomputePaths)
+            self._path = None
+            self.pathPending = True
+
+    @property
+    def path(self):
+        """Ruta del auto; se calcula al pedirla por primera vez"""
+        if self.pathPending:
+            with self.model.pathLock:
+                if self.pathPending:
+                    self._path = self.calculatePath(self.now, self.dest, self.model.graph)
+                    self.pathPending = False
+        return self._path
+
+    @path.setter
+    def path(self, path):
+        with self.model.pathLock:
+            self._path = path
+            self.pathPending = False
 
     def move(self):
         """
         Mueve el automóvil a la siguiente posición, dependiendo de las condiciones de su entorno.
         """
-        if self.path is None or len(self.path) == 0:
+        proposal = self.propose()
+        if proposal is None:
             return
+
+        action, nextPos = proposal
+        if action == "park":
+            self.park()
+        # Mover el auto si no hay otro auto en la siguiente posición
+        elif not any(isinstance(agent, Car) for agent in self.model.grid.get_cell_list_contents([nextPos])):
+            self.commitMove(nextPos)
+        else:
+            self.waiting = True
+
+    def propose(self):
+        """
+        Decide, sin modificar el modelo, qué quiere hacer el auto en este paso.
+
+        Returns:
+            tuple: ("park", dest) si el siguiente paso es entrar a su destino, ("move", nextPos) si quiere
+                avanzar a la siguiente celda, o None si no tiene ruta o el semáforo está en rojo.
+        """
+        if self.path is None or len(self.path) < 2:
+            return None
         
         nextPos = self.path[1]
 
         if nextPos == self.dest:
-            destParking = [agent for agent in self.model.grid.get_cell_list_contents([self.dest]) if isinstance(agent, Parking)][0]
-            if destParking.currentCars < destParking.capacity:
-                destParking.addCar()
-                self.model.grid.remove_agent(self)
-                self.path = None
-                print(f"El coche {self.unique_id} se ha estacionado en el estacionamiento {destParking.unique_id + 1}")
-            else:
-                print(f"El coche {self.unique_id} no encontró espacio en {self.dest}. Buscando otro estacionamiento.")
-                newDest = self.model.nearestParking(self.pos)
-                if newDest:
-                    self.dest = newDest
-                    self.path = self.calculatePath(self.pos, self.dest, self.model.directions)
-                    print(f"El coche {self.unique_id} nuevo path: {self.path}")
-                else:
-                    print(f"El coche {self.unique_id} no encontró estacionamiento.")
-            return
+            return ("park", nextPos)
+
+        # Verifica si hay un semáforo en la siguiente posición
+        for agent in self.model.grid.get_cell_list_contents([nextPos]):
+            if isinstance(agent, TrafficLight):
+                if agent.state == "red":
+                    return None
+        return ("move", nextPos)
+
+    def park(self):
+        """
+        Intenta estacionar el auto en su destino. Si está lleno, busca otro estacionamiento y recalcula la ruta.
+        """
+        destParking = self.model.parkings[self.dest]
+        if destParking.addCar(self):
+            self.reservation = None
+            self.model.dirtyCells.add(self.pos)
+            self.model.grid.remove_agent(self)
+            self.path = None
+            self.parked = True
+            print(f"El coche {self.unique_id} se ha estacionado en el estacionamiento {destParking.unique_id + 1}")
+            self.model.carParked(self)
         else:
-            if self.path is None:
-                return
+            print(f"El coche {self.unique_id} no encontró espacio en {self.dest}. Buscando otro estacionamiento.")
+            newDest = self.model.nearestParking(self.pos)
+            if newDest:
+                self.dest = newDest
+                self.model.reserveParking(self, newDest)
+                self.path = self.calculatePath(self.pos, self.dest, self.model.graph)
+                print(f"El coche {self.unique_id} nuevo path: {self.path}")
             else:
-                nextPos = self.path[1]
-                
-                # Verifica si hay un semáforo en la siguiente posición
-                for agent in self.model.grid.get_cell_list_contents([nextPos]):
-                    if isinstance(agent, TrafficLight):
-                        if agent.state == "red":
-                            return
-
-                # Mover el auto si no hay otro auto en la siguiente posición
-                if not any(isinstance(agent, Car) for agent in self.model.grid.get_cell_list_contents([nextPos])):
-                    self.leaveParking()
-                    self.model.grid.move_agent(self, nextPos)
-                    self.pos = nextPos
-                    self.path = self.path[1:]
-                else:
-                    self.waiting = True
-    
+                print(f"El coche {self.unique_id} no encontró estacionamiento.")
+
+    def commitMove(self, nextPos):
+        """
+        Avanza el auto a la siguiente celda de su ruta.
 
-    def calculatePath(self, initial, dest, directions):
+        Params:
+            nextPos (tuple): La siguiente celda de la ruta.
+        """
+        self.leaveParking()
+        self.model.dirtyCells.add(self.pos)
+        self.model.dirtyCells.add(nextPos)
+        self.model.grid.move_agent(self, nextPos)
+        self.pos = nextPos
+        self.path = self.path[1:]
+
+    def calculatePath(self, initial, dest, graph):
         """
         Calcula el camino que debe de seguir el auto para llegar a su destino, respetando las direcciones de cada celda.
 
         Params:
             initial (tuple): La posición inicial del auto.
             dest (tuple): La posición de destino del auto.
-            directions (dict): Diccionario de direcciones posibles desde cada celda.
+            graph (dict): Grafo compilado de la ciudad (celdas vecinas alcanzables desde cada celda).
 
         Returns:
-            list: Lista de posiciones que componen el camino desde initial hasta dest.
-        """
-        queue = []
-        heapq.heappush(queue, (0, initial))
-        costs = {initial: 0}
-        paths = {initial: []}
-
-        while queue:
-            currentCost, currentPos = heapq.heappop(queue)
-            if currentPos == dest:
-                return paths[currentPos] + [dest]
-
-            # Obtener las direcciones posibles desde la posición actual
-            possible_directions = directions.get(currentPos, [])
-            if currentPos in self.model.parkingsDirections:
-                for direction in self.model.parkingsDirections[currentPos]:
-                    if direction not in possible_directions:
-                        possible_directions.append(direction)
-
-            if currentPos in self.model.parkingEntry:
-                for direction in self.model.parkingEntry[currentPos]:
-                    if direction not in possible_directions:
-                        possible_directions.append(direction)
-
-            for direc in possible_directions:
-                if direc == "up":
-                    newPos = (currentPos[0], currentPos[1] + 1)
-                elif direc == "down":
-                    newPos = (currentPos[0], currentPos[1] - 1)
-                elif direc == "left":
-                    newPos = (currentPos[0] - 1, currentPos[1])
-                elif direc == "right":
-                    newPos = (currentPos[0] + 1, currentPos[1])
-
-                newCost = currentCost + 1
-
-                if newPos not in costs or newCost < costs[newPos]:
-                    costs[newPos] = newCost
-                    paths[newPos] = paths[currentPos] + [currentPos]
-                    heapq.heappush(queue, (newCost, newPos))
-        
-        return None 
+            list: Lista de posiciones que componen el camino desde initial hasta dest, o None si
+                el destino no es alcanzable.
+        """
+        # Si el destino es un estacionamiento que no es alcanzable no hace falta explorar el grafo;
+        # la alcanzabilidad solo está precalculada para los estacionamientos
+        if dest in self.model.parkingBits and not self.model.canReach(initial, dest):
+            return None
+        if self.model.router is not None:
+            return self.model.router.query(initial, dest)
+
+        route = self.model.routeTable.get((initial, dest))
+        if route is not None:
+            return list(route)
+        return shortestPath(graph, initial, dest)
 
     def step(self):
         """Avanza un paso en la simulación"""
@@ -203,8 +297,7 @@ class Car(mesa.Agent):
     def leaveParking(self):
         """Cuando el carro sale del estacionamiento"""
         if not self.left:
-            startParking = [agent for agent in self.model.grid.get_cell_list_contents([self.now]) if isinstance(agent, Parking)][0]
-            startParking.removeCar()
+            self.model.parkings[self.now].removeCar()
             self.left = True
 
 
@@ -0,0 +1,132 @@
+# Este archivo contiene el dibujo de los agentes y la cuadrícula de la visualización de la ciudad.
+# Solo lo importa createServer (ver visualization3.py), así que mesa se carga hasta crear el servidor.
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import os, time
+from mesa.visualization.ModularVisualization import VisualizationElement
+from agents3 import Car, TrafficLight, Parking, Obstacle
+
+def agent_portrayal(agent):
+    """
+    Define cómo se visualizan los agentes en la cuadrícula.
+
+    Params:
+        agent (mesa.Agent): El agente a visualizar.
+
+    Returns:
+        dict: Un diccionario con las propiedades de visualización del agente.
+    """
+    if isinstance(agent, Car):
+        portrayal = {"Shape": "circle",
+                     "Color": "blue",
+                     "Filled": "true",
+                     "Layer": 3,
+                     "r": 0.8}
+    elif isinstance(agent, TrafficLight):
+        color = "red" if agent.state == "red" else "green" if agent.state == "green" else "yellow"
+        portrayal = {"Shape": "rect",
+                     "Color": color,
+                     "Filled": "true",
+                     "Layer": 1,
+                     "w": 1,
+                     "h": 1}
+    elif isinstance(agent, Parking):
+        color = "gray" if agent.currentCars < agent.capacity else "orange"
+        portrayal = {"Shape": "rect",
+                     "Color": color,
+                     "Filled": "true",
+                     "Layer": 2,
+                     "w": 1,
+                     "h": 1}
+    elif isinstance(agent, Obstacle):
+        portrayal = {"Shape": "rect", 
+                     "Color": "#5B9BD5", 
+                     "Filled": "true", 
+                     "Layer": 0, 
+                     "w": 1, 
+                     "h": 1}
+    return portrayal
+
+class DirtyCanvasGrid(VisualizationElement):
+    """
+    Cuadrícula que envía al navegador solo lo que cambió. Con un modelo nuevo se envía una vez la capa
+    estática (obstáculos) y el dibujo de las demás celdas; después, en cada cuadro, solo las celdas
+    modificadas (autos que se movieron, semáforos que cambiaron y estacionamientos que se llenaron o
+    vaciaron). El navegador (DeltaCanvasModule.js) guarda las celdas y vuelve a pintar solo esas.
+    """
+    local_includes = ["DeltaCanvasModule.js"]
+    local_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def __init__(self, portrayal_method, grid_width, grid_height, canvas_width=500, canvas_height=500,
+                 maxFps=10, staticTypes=(Obstacle,)):
+        """
+        Params:
+            portrayal_method (function): Función que regresa el dibujo de un agente.
+            grid_width (int): Ancho de la cuadrícula.
+            grid_height (int): Altura de la cuadrícula.
+            canvas_width (int): Ancho del canvas en pixeles.
+            canvas_height (int): Altura del canvas en pixeles.
+            maxFps (float): Máximo de cuadros por segundo. Los pasos de la simulación que llegan antes
+                de tiempo no envían celdas; sus cambios se acumulan para el siguiente cuadro.
+            staticTypes (tuple): Clases de los agentes que nunca cambian (la capa estática).
+        """
+        super().__init__()
+        self.portrayal_method = portrayal_method
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+        self.minInterval = 1 / maxFps if maxFps else 0
+        self.staticTypes = staticTypes
+        self.js_code = f"elements.push(new DeltaCanvasModule({canvas_width}, {canvas_height}, {grid_width}, {grid_height}));"
+        self.model = None
+        self.lastFrame = 0
+
+    def portrayCell(self, model, pos, static=False):
+        """Regresa la lista de dibujos de los agentes de una celda (de la capa estática o de la dinámica)"""
+        cell = []
+        for agent in model.grid.get_cell_list_contents([pos]):
+            if isinstance(agent, self.staticTypes) != static:
+                continue
+            portrayal = self.portrayal_method(agent)
+            if portrayal:
+                portrayal["x"] = pos[0]
+                portrayal["y"] = pos[1]
+                cell.append(portrayal)
+        return cell
+
+    def render(self, model):
+        """
+        Regresa los cambios de la cuadrícula desde el último cuadro.
+
+        Returns:
+            dict: {"reset": True, "static": [...], "cells": {...}} con un modelo nuevo, o {"cells": {...}}
+                con las celdas que cambiaron ("x,y" -> lista de dibujos; una lista vacía borra la celda).
+        """
+        now = time.perf_counter()
+        if model is not self.model:
+            self.model = model
+            static = []
+            cells = {}
+            for x in range(model.grid.width):
+                for y in range(model.grid.height):
+                    static += self.portrayCell(model, (x, y), static=True)
+                    cell = self.portrayCell(model, (x, y))
+                    if cell:
+                        cells[f"{x},{y}"] = cell
+            model.dirtyCells.clear()
+            self.lastFrame = now
+            return {"reset": True, "static": static, "cells": cells}
+        if now - self.lastFrame < self.minInterval:
+            return {"cells": {}}
+
+        cells = {f"{x},{y}": self.portrayCell(model, (x, y)) for x, y in model.dirtyCells}
+        model.dirtyCells.clear()
+        self.lastFrame = now
+        return {"cells": cells}
@@ -0,0 +1,89 @@
+# Este archivo contiene el generador de demanda de la simulación de la ciudad.
+# Genera viajes entre estacionamientos a lo largo del tiempo y recicla los autos que ya llegaron.
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import math
+
+class Demand:
+    """
+    Clase que genera viajes a partir de una matriz origen-destino de tasas.
+    Los autos que terminan su viaje se retiran del calendario y se guardan en un pool para reutilizarse.
+    """
+
+    def __init__(self, model, rates, profile=None) -> None:
+        """
+        Inicializa el generador de demanda.
+
+        Params:
+            model (CityModel): El modelo al que pertenece el generador.
+            rates (list): Matriz de tasas; rates[i][j] es el número promedio de viajes por paso
+                del estacionamiento i + 1 al estacionamiento j + 1.
+            profile (list): Factores por paso (perfil horario) que multiplican las tasas.
+                Se recorre de forma cíclica. Si es None las tasas son constantes.
+        """
+        self.model = model
+        # Solo se generan viajes entre estacionamientos que se pueden alcanzar
+        self.rates = [(i + 1, j + 1, rate) for i, row in enumerate(rates) for j, rate in enumerate(row)
+                      if rate > 0 and i != j and i < len(model.parkingsPos) and j < len(model.parkingsPos)
+                      and model.canReach(model.parkingsPos[i], model.parkingsPos[j])]
+        self.profile = profile
+        self.pool = []
+        self.tick = 0
+
+    def poisson(self, mean):
+        """
+        Obtiene una muestra de una distribución de Poisson (algoritmo de Knuth).
+
+        Params:
+            mean (float): La media de la distribución.
+
+        Returns:
+            int: El número de eventos.
+        """
+        limit = math.exp(-mean)
+        count = 0
+        product = self.model.random.random()
+        while product > limit:
+            count += 1
+            product *= self.model.random.random()
+        return count
+
+    def step(self):
+        """
+        Genera los viajes de un paso de la simulación. Un viaje solo sale si en su estacionamiento de
+        origen hay un auto estacionado que todavía no tiene viaje.
+
+        Returns:
+            int: Número de autos creados en este paso.
+        """
+        factor = self.profile[self.tick % len(self.profile)] if self.profile else 1
+        self.tick += 1
+        created = 0
+        for start, end, rate in self.rates:
+            for _ in range(self.poisson(rate * factor)):
+                if self.model.spawnCar(start, end, fromDemand=True):
+                    created += 1
+        return created
+
+    def acquire(self):
+        """Regresa un auto del pool, o None si el pool está vacío"""
+        if self.pool:
+            return self.pool.pop()
+        return None
+
+    def retire(self, car):
+        """
+        Retira un auto que ya terminó su viaje y lo guarda en el pool.
+
+        Params:
+            car (Car): El auto a retirar.
+        """
+        self.model.schedule.remove(car)
+        self.model.cars.pop(car.unique_id, None)
+        self.pool.append(car)
@@ -0,0 +1,173 @@
+# Este archivo contiene las funciones para compilar y analizar el grafo de calles de la ciudad.
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import hashlib, heapq
+
+moves = {
+    "up": (0, 1),
+    "down": (0, -1),
+    "left": (-1, 0),
+    "right": (1, 0)
+}
+
+def compileGraph(directions, *extraDirections):
+    """
+    Convierte los diccionarios de direcciones en un grafo de celdas vecinas.
+
+    Params:
+        directions (dict): Diccionario de direcciones posibles desde cada celda.
+        extraDirections (dict): Diccionarios adicionales (salidas y entradas de estacionamientos)
+            cuyas direcciones se suman a las de la celda.
+
+    Returns:
+        dict: Para cada celda, la tupla de celdas a las que se puede avanzar. Las celdas que solo
+            son destino aparecen con una tupla vacía.
+    """
+    graph = {}
+    for table in (directions,) + extraDirections:
+        for pos, possibleDirections in table.items():
+            neighbors = graph.setdefault(pos, [])
+            for direc in possibleDirections:
+                dx, dy = moves[direc]
+                newPos = (pos[0] + dx, pos[1] + dy)
+                if newPos not in neighbors:
+                    neighbors.append(newPos)
+    for neighbors in list(graph.values()):
+        for newPos in neighbors:
+            graph.setdefault(newPos, [])
+    return {pos: tuple(neighbors) for pos, neighbors in graph.items()}
+
+def graphFingerprint(graph):
+    """
+    Calcula una huella del grafo que no depende del orden de sus celdas ni de sus vecinos.
+
+    Params:
+        graph (dict): Grafo compilado con compileGraph (o una vista equivalente).
+
+    Returns:
+        str: La huella (SHA-256 en hexadecimal).
+    """
+    cells = sorted((pos, tuple(sorted(neighbors))) for pos, neighbors in graph.items())
+    return hashlib.sha256(repr(cells).encode()).hexdigest()
+
+def shortestPath(graph, initial, dest):
+    """
+    Calcula el camino más corto entre dos celdas (Dijkstra con costo 1 por celda).
+
+    Params:
+        graph (dict): Grafo compilado con compileGraph.
+        initial (tuple): La celda de origen.
+        dest (tuple): La celda de destino.
+
+    Returns:
+        list: Lista de posiciones desde initial hasta dest, o None si no hay camino.
+    """
+    queue = []
+    heapq.heappush(queue, (0, initial))
+    costs = {initial: 0}
+    parents = {initial: None}
+
+    while queue:
+        currentCost, currentPos = heapq.heappop(queue)
+        if currentPos == dest:
+            path = []
+            while currentPos is not None:
+                path.append(currentPos)
+                currentPos = parents[currentPos]
+            return path[::-1]
+
+        newCost = currentCost + 1
+        for newPos in graph.get(currentPos, ()):
+            if newPos not in costs or newCost < costs[newPos]:
+                costs[newPos] = newCost
+                parents[newPos] = currentPos
+                heapq.heappush(queue, (newCost, newPos))
+
+    return None
+
+def stronglyConnectedComponents(graph):
+    """
+    Calcula las componentes fuertemente conexas del grafo (algoritmo de Tarjan, iterativo).
+
+    Params:
+        graph (dict): Grafo compilado con compileGraph.
+
+    Returns:
+        tuple: (component, order) donde component asigna a cada celda el número de su componente y
+            order es la lista de componentes en orden topológico inverso (primero las que no
+            tienen salida).
+    """
+    index = {}
+    low = {}
+    stack = []
+    onStack = set()
+    component = {}
+    order = []
+    counter = 0
+
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, 0)]
+        while work:
+            pos, i = work.pop()
+            if i == 0:
+                index[pos] = low[pos] = counter
+                counter += 1
+                stack.append(pos)
+                onStack.add(pos)
+            neighbors = graph[pos]
+            if i < len(neighbors):
+                work.append((pos, i + 1))
+                newPos = neighbors[i]
+                if newPos not in index:
+                    work.append((newPos, 0))
+                elif newPos in onStack:
+                    low[pos] = min(low[pos], index[newPos])
+                continue
+            if low[pos] == index[pos]:
+                comp = len(order)
+                members = []
+                while True:
+                    member = stack.pop()
+                    onStack.discard(member)
+                    component[member] = comp
+                    members.append(member)
+                    if member == pos:
+                        break
+                order.append(members)
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[pos])
+    return component, order
+
+def reachabilityMatrix(graph, targets):
+    """
+    Calcula, para cada componente fuertemente conexa, el conjunto de destinos alcanzables.
+
+    Params:
+        graph (dict): Grafo compilado con compileGraph.
+        targets (list): Posiciones de los destinos (estacionamientos); el bit i corresponde a targets[i].
+
+    Returns:
+        tuple: (component, reach) donde component asigna a cada celda su componente y reach[c] es un
+            entero cuyos bits indican los destinos alcanzables desde la componente c.
+    """
+    component, order = stronglyConnectedComponents(graph)
+    reach = [0] * len(order)
+    for bit, pos in enumerate(targets):
+        if pos in component:
+            reach[component[pos]] |= 1 << bit
+    # Las componentes salen en orden topológico inverso: los sucesores ya están resueltos
+    for comp, members in enumerate(order):
+        for pos in members:
+            for newPos in graph[pos]:
+                if component[newPos] != comp:
+                    reach[comp] |= reach[component[newPos]]
+    return component, reach
@@ -0,0 +1,233 @@
+# Este archivo contiene el generador de carga para el servidor de la simulación de tráfico.
+# Arranca server.py en un proceso local, simula muchos clientes consultando /positions, /path/<carId>
+# y /paths, y reporta latencias, throughput y el consumo de CPU y memoria del servidor.
+# Uso:
+#       python loadtest3.py --cars 70 --tick-rate 5 --clients 1,10,50 --duration 10
+# En el mapa de 24x24 las flotas de más de unos 80 autos se atoran en pocos pasos (desde unos 95 ya no
+# llegan a sus destinos) y el servidor queda respondiendo un modelo congelado; flotas más grandes solo
+# sirven para medir el tamaño de las respuestas, no el costo de un modelo que se mueve.
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import argparse, http.client, json, os, random, subprocess, sys, threading, time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def startServer(port, numCars, tickRate):
+    """
+    Arranca server.py en otro proceso (sin el recargador de modo debug) y espera a que responda.
+
+    Returns:
+        subprocess.Popen: El proceso del servidor.
+    """
+    env = dict(os.environ, CITY_NUM_CARS=str(numCars), CITY_TICK_RATE=str(tickRate))
+    code = f"import server; server.create_app().run(host='127.0.0.1', port={port}, threaded=True)"
+    process = subprocess.Popen([sys.executable, "-c", code], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("El servidor terminó al arrancar")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            # /positions construye el modelo, así que la carga no mide la construcción
+            connection.request("GET", "/positions?fields=id&limit=1")
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+class ResourceSampler(threading.Thread):
+    """Hilo que mide periódicamente el uso de CPU y la memoria residente de un proceso"""
+
+    def __init__(self, pid, interval=0.5) -> None:
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.cpuSamples = []
+        self.maxRss = 0
+        self.stopEvent = threading.Event()
+
+    def cpuTime(self):
+        """Regresa el tiempo de CPU (segundos) y la memoria residente (bytes) del proceso"""
+        if psutil is not None:
+            process = psutil.Process(self.pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss
+        with open(f"/proc/{self.pid}/stat") as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{self.pid}/statm") as file:
+            rss = int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"), rss
+
+    def run(self):
+        try:
+            lastCpu, _ = self.cpuTime()
+            lastTime = time.perf_counter()
+            while not self.stopEvent.wait(self.interval):
+                cpu, rss = self.cpuTime()
+                now = time.perf_counter()
+                self.cpuSamples.append(100 * (cpu - lastCpu) / (now - lastTime))
+                self.maxRss = max(self.maxRss, rss)
+                lastCpu, lastTime = cpu, now
+        except Exception:
+            # Sin /proc ni psutil, o si el servidor terminó, se deja de medir
+            return
+
+    def stop(self):
+        self.stopEvent.set()
+        self.join()
+
+def client(port, carIds, pathRatio, batchSize, extraPaths, pageSize, stopTime, latencies, errors, lock):
+    """
+    Cliente que hace peticiones sin pausa hasta stopTime.
+
+    Params:
+        port (int): Puerto del servidor.
+        carIds (list): Ids de los autos que se pueden consultar.
+        pathRatio (float): Fracción de peticiones a /path/<carId> o /paths; el resto va a /positions.
+        batchSize (int): Si es mayor que 1, se consultan las rutas en lote con /paths.
+        extraPaths (list): Rutas adicionales que se consultan con la misma probabilidad que /positions.
+        pageSize (int): Si es mayor que 0, /positions se pide paginado.
+        stopTime (float): Momento (time.perf_counter) en el que termina el cliente.
+        latencies (dict): Latencias por endpoint; se comparte entre clientes.
+        errors (dict): Errores por código de estado (o "conexión"); se comparte entre clientes.
+        lock (threading.Lock): Protege latencies y errors.
+    """
+    rng = random.Random()
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Accept-Encoding": "gzip"}
+    local = {}
+    failures = {}
+    while time.perf_counter() < stopTime:
+        if carIds and rng.random() < pathRatio:
+            if batchSize > 1:
+                ids = rng.sample(carIds, min(batchSize, len(carIds)))
+                name, url = "/paths", "/paths?ids=" + ",".join(map(str, ids))
+            else:
+                name = "/path/<carId>"
+                url = f"/path/{rng.choice(carIds)}"
+        else:
+            choices = ["/positions"] + extraPaths
+            name = url = rng.choice(choices)
+            if url == "/positions" and pageSize > 0:
+                url += f"?offset={rng.randrange(0, max(len(carIds), 1), pageSize)}&limit={pageSize}"
+        start = time.perf_counter()
+        try:
+            connection.request("GET", url, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            # Cualquier respuesta que no sea 2xx (por ejemplo un 404 por una ruta mal escrita) es un error
+            if not 200 <= response.status < 300:
+                failures[response.status] = failures.get(response.status, 0) + 1
+                continue
+        except (OSError, http.client.HTTPException):
+            failures["conexión"] = failures.get("conexión", 0) + 1
+            connection.close()
+            continue
+        local.setdefault(name, []).append(time.perf_counter() - start)
+    connection.close()
+    with lock:
+        for name, values in local.items():
+            latencies.setdefault(name, []).extend(values)
+        for status, count in failures.items():
+            errors[status] = errors.get(status, 0) + count
+
+def percentile(values, fraction):
+    """Percentil (por rango más cercano) de una lista ordenada"""
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def runLoad(port, pid, numClients, duration, carIds, pathRatio, batchSize, extraPaths, pageSize):
+    """
+    Ejecuta una ronda de carga con numClients clientes concurrentes.
+
+    Returns:
+        dict: Resultados de la ronda.
+    """
+    latencies = {}
+    errors = {}
+    lock = threading.Lock()
+    sampler = ResourceSampler(pid)
+    sampler.start()
+    stopTime = time.perf_counter() + duration
+    threads = [threading.Thread(target=client, args=(port, carIds, pathRatio, batchSize, extraPaths, pageSize,
+                                                     stopTime, latencies, errors, lock))
+               for _ in range(numClients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    allLatencies = sorted(value for values in latencies.values() for value in values)
+    return {
+        "clients": numClients,
+        "requests": len(allLatencies),
+        "errors": sum(errors.values()),
+        "errorsByStatus": {str(status): count for status, count in errors.items()},
+        "throughput": len(allLatencies) / elapsed,
+        "p50": percentile(allLatencies, 0.50) * 1000,
+        "p90": percentile(allLatencies, 0.90) * 1000,
+        "p99": percentile(allLatencies, 0.99) * 1000,
+        "endpoints": {name: percentile(sorted(values), 0.99) * 1000 for name, values in latencies.items()},
+        "cpu": sum(sampler.cpuSamples) / len(sampler.cpuSamples) if sampler.cpuSamples else None,
+        "rssMb": sampler.maxRss / 2 ** 20 if sampler.maxRss else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor de la simulación")
+    parser.add_argument("--cars", type=int, default=70,
+                        help="tamaño de la flota (con más de unos 80 autos el mapa se atora)")
+    parser.add_argument("--tick-rate", type=float, default=5, help="pasos por segundo del modelo (0 = sin avanzar)")
+    parser.add_argument("--clients", default="1,10,50", help="números de clientes concurrentes, separados por comas")
+    parser.add_argument("--duration", type=float, default=10, help="segundos por ronda")
+    parser.add_argument("--path-ratio", type=float, default=0.5, help="fracción de peticiones de rutas")
+    parser.add_argument("--batch", type=int, default=1, help="autos por petición de rutas (mayor que 1 usa /paths)")
+    parser.add_argument("--page-size", type=int, default=0, help="tamaño de página de /positions (0 = sin paginar)")
+    parser.add_argument("--extra-path", action="append", default=[], help="ruta adicional a consultar (repetible)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="imprime los resultados como JSON")
+    args = parser.parse_args()
+
+    process = startServer(args.port, args.cars, args.tick_rate)
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", args.port, timeout=30)
+        connection.request("GET", "/positions?fields=id")
+        carIds = [car["id"] for car in json.loads(connection.getresponse().read())["carPaths"]]
+        connection.close()
+
+        results = []
+        for numClients in [int(value) for value in args.clients.split(",")]:
+            result = runLoad(args.port, process.pid, numClients, args.duration, carIds, args.path_ratio,
+                             args.batch, args.extra_path, args.page_size)
+            results.append(result)
+            if not args.json:
+                cpu = f"{result['cpu']:.0f}%" if result["cpu"] is not None else "n/d"
+                rss = f"{result['rssMb']:.0f} MB" if result["rssMb"] is not None else "n/d"
+                byStatus = ", ".join(f"{status}: {count}" for status, count in result["errorsByStatus"].items())
+                errors = f"{result['errors']} ({byStatus})" if byStatus else "0"
+                print(f"{numClients:>4} clientes: {result['throughput']:8.1f} req/s  "
+                      f"p50 {result['p50']:7.1f} ms  p90 {result['p90']:7.1f} ms  p99 {result['p99']:7.1f} ms  "
+                      f"errores {errors}  CPU {cpu}  memoria {rss}")
+        if args.json:
+            print(json.dumps(results, indent=2))
+    finally:
+        process.terminate()
+        process.wait()
+
+if __name__ == '__main__':
+    main()
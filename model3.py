@@ -6,11 +6,15 @@
 #       A01750338 Min Che Kim				
 #       A01750911 Yael Michel García López		
 # Fecha de creación: 14/11/2024
-# Última modificación: 22/11/2024
+# Última modificación: 19/10/2026
 
-import mesa
+import mesa, heapq, os, threading
 from agents3 import Car, TrafficLight, Parking, Obstacle
 from directions3 import getDirections
+from sync3 import SynchronousActivation
+from demand3 import Demand
+from graph3 import compileGraph, reachabilityMatrix
+from routing3 import ContractionHierarchy
 
 class CityModel(mesa.Model):
     """
@@ -18,7 +22,10 @@ class CityModel(mesa.Model):
     de un estacionamiento a otro
     """
 
-    def __init__(self, numCars, gridWidth, gridHeight, startParkings, endParkings):
+    def __init__(self, numCars, gridWidth, gridHeight, startParkings, endParkings,
+                 demandRates=None, demandProfile=None, parkingCapacity=None, parkedCars=0,
+                 reservationHold=150, router=None, signalPlan=None, seed=None,
+                 updateMode="random", cityData=None):
         """
         Inicializa el modelo de la simulación.
         
@@ -28,15 +35,47 @@ class CityModel(mesa.Model):
             gridHeight (int): Altura de la cuadrícula.
             startParkings (list): Lista con los números estacionamientos de inicio de los autos.
             endParkings (list): Lista con los números estacionamientos de destino de los autos.
+            demandRates (list): Matriz origen-destino de viajes promedio por paso (ver Demand).
+                Si se indica, durante toda la simulación salen viajes de los estacionamientos que tienen
+                autos (ver parkedCars) y los autos que llegan se reciclan.
+            demandProfile (list): Factores por paso que multiplican demandRates (perfil horario).
+            parkingCapacity (int): Capacidad de cada estacionamiento. Si es None, los autos iniciales
+                se reparten entre todos los estacionamientos.
+            parkedCars (int): Autos que ya están estacionados en cada estacionamiento al iniciar, además de
+                los autos iniciales (hasta llenar su capacidad). No recorren la ciudad por sí mismos: son
+                los autos con los que salen los viajes de la demanda.
+            reservationHold (int): Pasos que dura apartado el lugar de un auto antes de liberarse.
+            router (ContractionHierarchy | str): Motor de rutas precomputado. Si es el nombre de un
+                archivo, se carga de ahí; si no existe o se construyó con otro grafo, se construye y se
+                guarda. Si es None, cada auto calcula su ruta con Dijkstra.
+            signalPlan (list): Tiempos de cada semáforo, en el orden de trafficLightsPos. Cada elemento es
+                un diccionario con las llaves opcionales greenTime, yellowTime, redTime y offset.
+            seed (int): Semilla del generador aleatorio del modelo.
+            updateMode (str): "random" activa los agentes uno por uno en orden aleatorio; "synchronous"
+                usa SynchronousActivation (todos los autos proponen y después se mueven a la vez).
+            cityData (SharedCityData): Datos estáticos publicados en memoria compartida. Si se indican,
+                el modelo usa su grafo, alcanzabilidad y rutas en lugar de construir los suyos.
         """
-        super().__init__()
+        super().__init__(seed=seed)
         self.numCars = numCars
         self.grid = mesa.space.MultiGrid(gridWidth, gridHeight, True)
-        self.schedule = mesa.time.RandomActivation(self)
+        if updateMode not in ("random", "synchronous"):
+            raise ValueError(f"Modo de actualización desconocido: {updateMode}")
+        if updateMode == "synchronous":
+            self.schedule = SynchronousActivation(self)
+        else:
+            self.schedule = mesa.time.RandomActivation(self)
         self.running = True
+        # Autos que ya llegaron a su destino y autos que siguen en camino
         self.carsInDest = 0
+        self.activeCars = 0
+        self.cars = {}
+        # Protege el cálculo de rutas cuando se hace en segundo plano
+        self.pathLock = threading.Lock()
+        # Celdas cuyo contenido cambió desde el último cuadro de la visualización
+        self.dirtyCells = set()
         # Crear un diccionario de direcciones
-        self.directions = getDirections()
+        self.directions = getDirections() if cityData is None else None
 
         # Posiciones de los semáforos
         trafficLightsPos = [
@@ -117,13 +156,42 @@ class CityModel(mesa.Model):
             (19, 4): ["right"]     # Estacionamiento 17
         }
 
+        # Grafo de calles y matriz de alcanzabilidad entre estacionamientos
+        if cityData is None:
+            self.graph = compileGraph(self.directions, self.parkingsDirections, self.parkingEntry)
+            self.components, self.reach = reachabilityMatrix(self.graph, parkingsPos)
+            self.routeTable = {}
+        else:
+            self.graph = cityData.graph
+            self.components = cityData.components
+            self.reach = cityData.meta["reach"]
+            self.routeTable = cityData.routes
+        self.parkingBits = {pos: 1 << i for i, pos in enumerate(parkingsPos)}
+        if isinstance(router, str):
+            filename = router
+            router = ContractionHierarchy.load(filename, self.graph) if os.path.exists(filename) else None
+            # Si el archivo no existe o es de otro grafo, se construye de nuevo
+            if router is None:
+                router = ContractionHierarchy(self.graph)
+                router.save(filename)
+        self.router = router
+
         # Crear y colocar semáforos en la cuadrícula
+        self.trafficLights = []
         for i, pos in enumerate(trafficLightsPos):
             initialState = "red" if i < 10 else "green"
-            trafficLight = TrafficLight(i, self, pos, initialState)
+            timing = signalPlan[i] if signalPlan is not None and i < len(signalPlan) else {}
+            trafficLight = TrafficLight(i, self, pos, initialState, **timing)
+            self.trafficLights.append(trafficLight)
             self.schedule.add(trafficLight)
             self.grid.place_agent(trafficLight, pos)
 
+        self.parkingsPos = parkingsPos
+        self.parkings = {}
+        # Índice de estacionamientos con lugares libres y reservaciones ordenadas por vencimiento
+        self.freeParkings = set()
+        self.holds = []
+        self.reservationHold = reservationHold
         totalParkings = len(parkingsPos)
         baseCapacity = numCars // totalParkings
         extraCapacity = numCars % totalParkings
@@ -131,7 +199,12 @@ class CityModel(mesa.Model):
         # Crear y colocar estacionamientos en la cuadrícula
         for i, pos in enumerate(parkingsPos):
             capacity = baseCapacity + (1 if i < extraCapacity else 0)
+            if parkingCapacity is not None:
+                capacity = parkingCapacity
             parking = Parking(i, self, pos, capacity)
+            self.parkings[pos] = parking
+            if parking.freeSlots() > 0:
+                self.freeParkings.add(pos)
             self.schedule.add(parking)
             self.grid.place_agent(parking, pos)
 
@@ -160,34 +233,228 @@ class CityModel(mesa.Model):
             self.schedule.add(barrier)
             self.grid.place_agent(barrier, pos)
         
+        # Generador de viajes durante la simulación
+        self.demand = Demand(self, demandRates, demandProfile) if demandRates is not None else None
+
         # Crear y colocar autos en la cuadrícula si numCars es mayor que 0
+        self.nextCarId = len(trafficLightsPos) + len(parkingsPos) + len(self.obstaclePos)
+        # Toda la flota ocupa su lugar de origen antes de que algún auto aparte lugar en su destino
+        initialCars = []
         if self.numCars > 0:
             for i in range(self.numCars):
                 if i < len(startParkings) and i < len(endParkings):
-                    start = startParkings[i] - 1
-                    end = endParkings[i] - 1
-                    if start < len(parkingsPos) and end < len(parkingsPos):
-                        start = parkingsPos[start]
-                        end = parkingsPos[end]
-                        # carsAgent = Car(len(trafficLightsPos) + len(parkingsPos) + len(self.obstaclePos) + i, 
-                        #                 self, parkingsPos[start-1], parkingsPos[end-1])
-                        carsAgent = Car(len(trafficLightsPos) + len(parkingsPos) + len(self.obstaclePos) + i, 
-                                        self, start, end)
-                        self.schedule.add(carsAgent)
-                        self.grid.place_agent(carsAgent, carsAgent.now)
-
-                        startParking = [agent for agent in self.schedule.agents if isinstance(agent, Parking) and agent.pos == start][0]
-                        if startParking.addCar():
-                            print(f"El auto {carsAgent.unique_id} se estacionó en el estacionamiento {startParking.unique_id + 1}")
-                        else:
-                            print(f"El estacionamiento {startParking.unique_id + 1} está lleno")
-        
-    def nearestParking(self, currentPos):
+                    car = self.spawnCar(startParkings[i], endParkings[i], len(trafficLightsPos) + len(parkingsPos) + len(self.obstaclePos) + i, admit=False)
+                    if car is not None:
+                        initialCars.append(car)
+        self.nextCarId += self.numCars
+        for parking in self.parkings.values():
+            parking.currentCars += min(parkedCars, max(parking.freeSlots(), 0))
+            self.parkingChanged(parking)
+        for car in initialCars:
+            car.setTrip(car.now, self.admitCar(car, car.dest))
+
+    def spawnCar(self, startParking, endParking, uniqueId=None, fromDemand=False, admit=True):
+        """
+        Crea (o recicla del pool de la demanda) un auto y lo coloca en su estacionamiento de origen.
+
+        Params:
+            startParking (int): Número del estacionamiento de origen.
+            endParking (int): Número del estacionamiento de destino.
+            uniqueId (int): Identificador del auto. Si es None se usa el siguiente disponible.
+            fromDemand (bool): Si el viaje viene de la demanda, sale con uno de los autos estacionados en
+                el origen que todavía no tiene viaje, en lugar de sumar uno nuevo. Si no hay ninguno
+                no hay viaje.
+            admit (bool): Si es False no se aparta lugar en el destino; quien llama debe hacerlo
+                con admitCar.
+
+        Returns:
+            Car: El auto creado, o None si algún estacionamiento no existe o el viaje de la demanda
+                no es posible.
+        """
+        start = startParking - 1
+        end = endParking - 1
+        if not (0 <= start < len(self.parkingsPos) and 0 <= end < len(self.parkingsPos)):
+            return None
+        start = self.parkingsPos[start]
+        end = self.parkingsPos[end]
+        if not self.canReach(start, end):
+            if fromDemand:
+                return None
+            raise ValueError(f"El estacionamiento {endParking} no es alcanzable desde el estacionamiento {startParking}")
+
+        # El auto ocupa su lugar de origen antes de pedir lugar en el destino. Un viaje de la demanda
+        # usa uno de los autos ya estacionados ahí, cuyo lugar se libera al salir (ver Car.leaveParking)
+        startParking = self.parkings[start]
+        if fromDemand:
+            if startParking.idleCars() <= 0:
+                return None
+            parked = True
+        else:
+            parked = startParking.addCar()
+
+        if uniqueId is None:
+            uniqueId = self.nextCarId
+            self.nextCarId += 1
+
+        carsAgent = self.demand.acquire() if self.demand else None
+        if carsAgent is None:
+            carsAgent = Car(uniqueId, self, start, end)
+        else:
+            carsAgent.reset(uniqueId, start, end)
+        # Si el origen estaba lleno el auto no ocupa lugar ahí y al salir no debe liberar el de otro auto
+        carsAgent.left = not parked
+        if admit:
+            carsAgent.setTrip(start, self.admitCar(carsAgent, end))
+        self.cars[carsAgent.unique_id] = carsAgent
+        self.activeCars += 1
+        self.schedule.add(carsAgent)
+        self.grid.place_agent(carsAgent, carsAgent.now)
+        self.dirtyCells.add(carsAgent.now)
+
+        if not fromDemand:
+            if parked:
+                print(f"El auto {carsAgent.unique_id} se estacionó en el estacionamiento {startParking.unique_id + 1}")
+            else:
+                print(f"El estacionamiento {startParking.unique_id + 1} está lleno")
+        return carsAgent
+
+    def precomputePaths(self, background=True):
+        """
+        Calcula las rutas pendientes de todos los autos.
+
+        Params:
+            background (bool): Si es True, las rutas se calculan en un hilo aparte y los autos que se
+                muevan antes calculan la suya al momento.
+
+        Returns:
+            threading.Thread: El hilo que calcula las rutas, o None si se calcularon al momento.
+        """
+        def compute():
+            for car in list(self.cars.values()):
+                car.path
+        if not background:
+            compute()
+            return None
+        thread = threading.Thread(target=compute, daemon=True)
+        thread.start()
+        return thread
+
+    def canReach(self, pos, parkingPos):
+        """
+        Indica si un estacionamiento es alcanzable desde una celda respetando las direcciones.
+
+        Params:
+            pos (tuple): La celda de origen.
+            parkingPos (tuple): La posición del estacionamiento.
+
+        Returns:
+            bool: True si existe un camino de pos a parkingPos.
+        """
+        if pos == parkingPos:
+            return True
+        comp = self.components.get(pos)
+        return comp is not None and self.reach[comp] & self.parkingBits.get(parkingPos, 0) != 0
+
+    def admitCar(self, car, dest):
+        """
+        Aparta un lugar para el auto al iniciar su viaje.
+        Si el destino está lleno pero alguno de sus autos está por salir, el auto se forma en la lista
+        de espera del destino y recibe ese lugar al liberarse. Si no, se aparta el estacionamiento libre
+        más cercano al destino; si no hay ninguno, el auto también se forma en la lista de espera.
+
+        Params:
+            car (Car): El auto que inicia su viaje.
+            dest (tuple): La posición del estacionamiento de destino solicitado.
+
+        Returns:
+            tuple: La posición del estacionamiento al que debe ir el auto.
+        """
+        if self.reserveParking(car, dest):
+            return dest
+        parking = self.parkings[dest]
+        if parking.departingCars() > len(parking.waitlist):
+            parking.waitlist.append(car)
+            return dest
+        alternative = self.nearestParking(dest, exclude=car.now, origin=car.now)
+        if alternative and self.reserveParking(car, alternative):
+            print(f"El coche {car.unique_id} no tiene lugar en {dest}. Se apartó lugar en {alternative}.")
+            return alternative
+        self.parkings[dest].waitlist.append(car)
+        return dest
+
+    def reserveParking(self, car, pos):
+        """
+        Aparta un lugar para el auto en un estacionamiento.
+
+        Params:
+            car (Car): El auto que aparta el lugar.
+            pos (tuple): La posición del estacionamiento.
+
+        Returns:
+            bool: True si se pudo apartar el lugar.
+        """
+        parking = self.parkings[pos]
+        if parking.freeSlots() <= 0:
+            return False
+        expiry = self.schedule.steps + self.reservationHold
+        parking.reserved[car.unique_id] = expiry
+        heapq.heappush(self.holds, (expiry, pos, car.unique_id))
+        car.reservation = pos
+        self.parkingChanged(parking)
+        return True
+
+    def parkingChanged(self, parking):
+        """
+        Actualiza el índice de lugares libres y asigna los lugares libres a la lista de espera.
+
+        Params:
+            parking (Parking): El estacionamiento cuya ocupación cambió.
+        """
+        while parking.waitlist and parking.freeSlots() > 0:
+            car = parking.waitlist.popleft()
+            if car.dest == parking.pos and car.path is not None and car.reservation is None:
+                self.reserveParking(car, parking.pos)
+        self.dirtyCells.add(parking.pos)
+        if parking.freeSlots() > 0:
+            self.freeParkings.add(parking.pos)
+        else:
+            self.freeParkings.discard(parking.pos)
+
+    def expireHolds(self):
+        """Libera las reservaciones que ya vencieron"""
+        while self.holds and self.holds[0][0] <= self.schedule.steps:
+            expiry, pos, carId = heapq.heappop(self.holds)
+            parking = self.parkings[pos]
+            if parking.reserved.get(carId) == expiry:
+                del parking.reserved[carId]
+                car = self.cars.get(carId)
+                if car is not None and car.reservation == pos:
+                    car.reservation = None
+                self.parkingChanged(parking)
+
+    def carParked(self, car):
         """
-        Encuentra el estacionamiento disponible más cercano.
+        Se llama una sola vez cuando un auto se estaciona en su destino.
 
         Params:
-            currentPos (tuple): La posición actual del auto.
+            car (Car): El auto que se estacionó.
+        """
+        self.carsInDest += 1
+        self.activeCars -= 1
+        if self.demand is None and self.activeCars == 0:
+            self.running = False
+        if self.demand:
+            self.demand.retire(car)
+
+    def nearestParking(self, currentPos, exclude=None, origin=None):
+        """
+        Encuentra el estacionamiento disponible y alcanzable más cercano.
+
+        Params:
+            currentPos (tuple): La posición desde la que se mide la distancia.
+            exclude (tuple): Posición de un estacionamiento que no se debe considerar.
+            origin (tuple): Posición desde la que debe ser alcanzable el estacionamiento
+                (por omisión, currentPos).
 
         Returns:
             tuple: La posición del estacionamiento disponible más cercano
@@ -195,12 +462,14 @@ class CityModel(mesa.Model):
         minDist = float('inf')
         nearest = None
 
-        for parking in [agent for agent in self.schedule.agents if isinstance(agent, Parking)]:
-            if parking.currentCars < parking.capacity:
-                distance = abs(parking.pos[0] - currentPos[0]) + abs(parking.pos[1] - currentPos[1])
-                if distance < minDist:
+        if origin is None:
+            origin = currentPos
+        for pos in self.freeParkings:
+            if pos != exclude and self.canReach(origin, pos):
+                distance = abs(pos[0] - currentPos[0]) + abs(pos[1] - currentPos[1])
+                if distance < minDist or (distance == minDist and pos < nearest):
                     minDist = distance
-                    nearest = parking.pos
+                    nearest = pos
         #print(f"Nearest: {nearest}")
         return nearest
     
@@ -213,14 +482,31 @@ class CityModel(mesa.Model):
         """
         Avanza la simulación un paso en el tiempo.
         """
-        if self.carsInDest == self.numCars:
-            self.running = False 
-        else:
-            for agent in self.schedule.agents:
-                if isinstance(agent, TrafficLight):
-                    agent.changeState()
-                elif isinstance(agent, Car):
-                    if agent.pos == agent.dest:
-                        self.carsInDest += 1
+        self.expireHolds()
+        if self.demand:
+            self.demand.step()
+        if self.running:
+            for trafficLight in self.trafficLights:
+                trafficLight.changeState()
             #self.availability()
-        self.schedule.step()
\ No newline at end of file
+        self.schedule.step()
+
+    def run(self, maxSteps, until=None):
+        """
+        Avanza la simulación sin visualización hasta que todos los autos se estacionan,
+        se cumple la condición until o se alcanzan maxSteps pasos.
+
+        Params:
+            maxSteps (int): Número máximo de pasos a ejecutar.
+            until (function): Condición opcional de paro; recibe el modelo y regresa un bool.
+
+        Returns:
+            int: Número de pasos ejecutados.
+        """
+        steps = 0
+        while self.running and steps < maxSteps:
+            if until is not None and until(self):
+                break
+            self.step()
+            steps += 1
+        return steps
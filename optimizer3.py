@@ -0,0 +1,126 @@
+# Este archivo contiene el optimizador de tiempos de los semáforos de la ciudad.
+# Evalúa planes de semáforos con simulaciones cortas sin visualización, en paralelo y con las mismas
+# semillas para todos los planes (números aleatorios comunes).
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import contextlib, io, random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from model3 import CityModel
+
+# Escenario por omisión (el mismo que usa la visualización)
+defaultScenario = {
+    "numCars": 17,
+    "gridWidth": 24,
+    "gridHeight": 24,
+    "startParkings": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 13, 14, 15, 16, 17],
+    "endParkings": [2, 3, 4, 5, 7, 8, 9, 10, 11, 13, 14, 15, 16, 17, 18, 2]
+}
+
+numTrafficLights = 20
+
+# Semáforos de cada cruce, en el orden de trafficLightsPos de CityModel: los del primer acceso
+# empiezan en rojo y los del segundo en verde. Por ejemplo, (8, 23) y (8, 22) contra (6, 21) y (7, 21).
+crossings = [((2 * k, 2 * k + 1), (10 + 2 * k, 11 + 2 * k)) for k in range(numTrafficLights // 4)]
+
+def evaluatePlan(plan, scenario, seeds, maxSteps):
+    """
+    Evalúa un plan de semáforos simulando el escenario una vez por semilla.
+
+    Params:
+        plan (list): Plan de semáforos (ver el parámetro signalPlan de CityModel).
+        scenario (dict): Parámetros de CityModel del escenario a simular.
+        seeds (list): Semillas de las simulaciones; son las mismas para todos los planes.
+        maxSteps (int): Máximo de pasos de cada simulación.
+
+    Returns:
+        float: Promedio de autos estacionados por paso.
+    """
+    total = 0
+    for seed in seeds:
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = CityModel(**scenario, signalPlan=plan, seed=seed)
+            steps = model.run(maxSteps)
+        total += model.carsInDest / max(steps, 1)
+    return total / len(seeds)
+
+def crossingPlan(greenTime, crossGreenTime, offset, yellowTime=2):
+    """
+    Calcula los tiempos de los dos accesos de un cruce. Ambos tienen el mismo ciclo y el rojo de cada
+    acceso dura lo que el verde y el amarillo del otro, así que nunca están en verde a la vez.
+
+    Params:
+        greenTime (int): Pasos en verde del acceso que empieza en rojo.
+        crossGreenTime (int): Pasos en verde del acceso que empieza en verde.
+        offset (int): Pasos que se adelanta el ciclo del cruce (el mismo para los dos accesos).
+        yellowTime (int): Pasos en amarillo.
+
+    Returns:
+        tuple: Los tiempos del acceso que empieza en rojo y los del que empieza en verde.
+    """
+    first = {"greenTime": greenTime, "yellowTime": yellowTime, "redTime": crossGreenTime + yellowTime, "offset": offset}
+    second = {"greenTime": crossGreenTime, "yellowTime": yellowTime, "redTime": greenTime + yellowTime, "offset": offset}
+    return first, second
+
+def randomPlan(rng, greenRange=(2, 10), yellowTime=2):
+    """
+    Genera un plan aleatorio. En cada cruce se elige al azar el reparto del verde entre sus dos
+    accesos y el desfase del ciclo (ver crossingPlan).
+
+    Params:
+        rng (random.Random): Generador de números aleatorios.
+        greenRange (tuple): Mínimo y máximo de pasos en verde de cada acceso.
+        yellowTime (int): Pasos en amarillo.
+
+    Returns:
+        list: El plan de semáforos.
+    """
+    plan = [None] * numTrafficLights
+    for firstLights, secondLights in crossings:
+        greenTime = rng.randint(*greenRange)
+        crossGreenTime = rng.randint(*greenRange)
+        offset = rng.randrange(greenTime + crossGreenTime + 2 * yellowTime)
+        first, second = crossingPlan(greenTime, crossGreenTime, offset, yellowTime)
+        for i in firstLights:
+            plan[i] = first
+        for i in secondLights:
+            plan[i] = second
+    return plan
+
+def optimizeSignals(scenario=None, candidates=32, seeds=(0, 1, 2, 3), maxSteps=300, workers=None, searchSeed=0):
+    """
+    Busca el plan de semáforos que más autos estaciona por paso.
+
+    Params:
+        scenario (dict): Parámetros de CityModel (por omisión, defaultScenario).
+        candidates (int): Número de planes a evaluar, incluyendo el plan actual (5 / 2 / 5).
+        seeds (tuple): Semillas comunes con las que se evalúa cada plan.
+        maxSteps (int): Máximo de pasos de cada simulación.
+        workers (int): Número de procesos (por omisión, uno por núcleo).
+        searchSeed (int): Semilla para generar los planes candidatos.
+
+    Returns:
+        tuple: (plan, score) del mejor plan encontrado.
+    """
+    scenario = scenario or defaultScenario
+    rng = random.Random(searchSeed)
+    plans = [None] + [randomPlan(rng) for _ in range(candidates - 1)]
+    with ProcessPoolExecutor(workers) as pool:
+        scores = list(pool.map(evaluatePlan, plans, repeat(scenario), repeat(list(seeds)), repeat(maxSteps)))
+    best = max(range(len(plans)), key=lambda i: scores[i])
+    return plans[best], scores[best]
+
+if __name__ == '__main__':
+    plan, score = optimizeSignals()
+    if plan is None:
+        print(f"El plan actual es el mejor: {score:.3f} autos estacionados por paso")
+    else:
+        print(f"Mejor plan: {score:.3f} autos estacionados por paso")
+        for i, timing in enumerate(plan):
+            print(f"Semáforo {i}: {timing}")
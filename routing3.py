@@ -0,0 +1,240 @@
+# Este archivo contiene el motor de rutas por jerarquía de contracción (contraction hierarchy).
+# Se preprocesa una vez el grafo de calles y después cada ruta se resuelve explorando muy pocas celdas.
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import heapq, pickle
+from graph3 import graphFingerprint
+
+class ContractionHierarchy:
+    """
+    Clase que representa una jerarquía de contracción sobre el grafo compilado de la ciudad.
+    """
+
+    def __init__(self, graph=None, witnessLimit=200) -> None:
+        """
+        Construye la jerarquía a partir del grafo (si se indica).
+
+        Params:
+            graph (dict): Grafo compilado de la ciudad (ver graph3.compileGraph).
+            witnessLimit (int): Máximo de celdas que explora cada búsqueda de caminos alternativos
+                durante la contracción. Un límite menor acelera el preprocesamiento a cambio de
+                agregar algunos atajos innecesarios.
+        """
+        self.rank = {}
+        self.forwardUp = {}
+        self.backwardUp = {}
+        self.middle = {}
+        # Huella del grafo con el que se construyó (ver graph3.graphFingerprint)
+        self.fingerprint = None
+        if graph is not None:
+            self.build(graph, witnessLimit)
+
+    def witness(self, source, skip, maxCost, limit, out, targets=()):
+        """
+        Búsqueda de Dijkstra acotada desde source sin pasar por la celda skip.
+        Termina en cuanto se fijó el costo de todas las celdas de targets.
+
+        Returns:
+            dict: Costos de las celdas alcanzadas con costo menor o igual a maxCost.
+        """
+        costs = {source: 0}
+        queue = [(0, source)]
+        settled = 0
+        pending = set(targets)
+        while queue and settled < limit:
+            cost, pos = heapq.heappop(queue)
+            if cost > costs[pos]:
+                continue
+            if cost > maxCost:
+                break
+            settled += 1
+            pending.discard(pos)
+            if targets and not pending:
+                break
+            for newPos, edgeCost in out[pos].items():
+                newCost = cost + edgeCost
+                if newPos != skip and newCost < costs.get(newPos, float('inf')):
+                    costs[newPos] = newCost
+                    heapq.heappush(queue, (newCost, newPos))
+        return costs
+
+    def shortcuts(self, pos, out, inc, limit):
+        """Regresa los atajos (u, w, costo) necesarios para contraer la celda pos"""
+        result = []
+        for u, costIn in inc[pos].items():
+            targets = {w: costIn + costOut for w, costOut in out[pos].items() if w != u}
+            if not targets:
+                continue
+            costs = self.witness(u, pos, max(targets.values()), limit, out, targets)
+            for w, cost in targets.items():
+                if costs.get(w, float('inf')) > cost:
+                    result.append((u, w, cost))
+        return result
+
+    def build(self, graph, witnessLimit=200):
+        """
+        Contrae las celdas en orden de importancia y guarda las aristas hacia celdas de mayor rango.
+
+        Params:
+            graph (dict): Grafo compilado de la ciudad.
+            witnessLimit (int): Máximo de celdas por búsqueda de caminos alternativos.
+        """
+        self.fingerprint = graphFingerprint(graph)
+        out = {pos: {newPos: 1 for newPos in neighbors if newPos != pos} for pos, neighbors in graph.items()}
+        inc = {pos: {} for pos in out}
+        for pos, neighbors in out.items():
+            for newPos in neighbors:
+                inc[newPos][pos] = 1
+        contractedNeighbors = dict.fromkeys(out, 0)
+
+        # Atajos calculados para la prioridad de cada celda; se reutilizan al contraerla mientras
+        # ninguna de sus vecinas se contraiga (las celdas en changed se deben recalcular)
+        found = {}
+        changed = set()
+
+        def priority(pos):
+            found[pos] = self.shortcuts(pos, out, inc, witnessLimit)
+            return len(found[pos]) - len(inc[pos]) - len(out[pos]) + contractedNeighbors[pos]
+
+        queue = [(priority(pos), pos) for pos in out]
+        heapq.heapify(queue)
+        while queue:
+            _, pos = heapq.heappop(queue)
+            # Actualización perezosa: si la prioridad empeoró se vuelve a formar
+            if pos in changed:
+                changed.discard(pos)
+                current = priority(pos)
+                if queue and current > queue[0][0]:
+                    heapq.heappush(queue, (current, pos))
+                    continue
+
+            for u, w, cost in found.pop(pos):
+                if cost < out[u].get(w, float('inf')):
+                    out[u][w] = cost
+                    inc[w][u] = cost
+                    self.middle[(u, w)] = pos
+
+            self.rank[pos] = len(self.rank)
+            self.forwardUp[pos] = tuple(out[pos].items())
+            self.backwardUp[pos] = tuple(inc[pos].items())
+            for u in inc[pos]:
+                del out[u][pos]
+                contractedNeighbors[u] += 1
+                changed.add(u)
+            for w in out[pos]:
+                del inc[w][pos]
+                contractedNeighbors[w] += 1
+                changed.add(w)
+            del out[pos], inc[pos]
+
+    def search(self, edges, costs, parents, queue, otherCosts, best):
+        """Avanza un paso de una de las dos búsquedas y regresa el mejor punto de encuentro"""
+        cost, pos = heapq.heappop(queue)
+        if cost > costs[pos]:
+            return best
+        if pos in otherCosts and cost + otherCosts[pos] < best[0]:
+            best = (cost + otherCosts[pos], pos)
+        for newPos, edgeCost in edges.get(pos, ()):
+            newCost = cost + edgeCost
+            if newCost < costs.get(newPos, float('inf')):
+                costs[newPos] = newCost
+                parents[newPos] = pos
+                heapq.heappush(queue, (newCost, newPos))
+        return best
+
+    def unpack(self, u, w):
+        """Expande una arista de la jerarquía (posiblemente un atajo) en la lista de celdas de u a w, sin incluir u"""
+        cells = []
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            mid = self.middle.get((a, b))
+            if mid is None:
+                cells.append(b)
+            else:
+                stack.append((mid, b))
+                stack.append((a, mid))
+        return cells
+
+    def query(self, initial, dest):
+        """
+        Calcula el camino más corto entre dos celdas.
+
+        Params:
+            initial (tuple): La celda de origen.
+            dest (tuple): La celda de destino.
+
+        Returns:
+            list: Lista de posiciones desde initial hasta dest (incluyéndolas), o None si no hay camino.
+        """
+        if initial not in self.rank or dest not in self.rank:
+            return None
+        if initial == dest:
+            return [initial]
+
+        forwardCosts, backwardCosts = {initial: 0}, {dest: 0}
+        forwardParents, backwardParents = {initial: None}, {dest: None}
+        forwardQueue, backwardQueue = [(0, initial)], [(0, dest)]
+        best = (float('inf'), None)
+        while forwardQueue or backwardQueue:
+            if forwardQueue and forwardQueue[0][0] < best[0]:
+                best = self.search(self.forwardUp, forwardCosts, forwardParents, forwardQueue, backwardCosts, best)
+            else:
+                forwardQueue = []
+            if backwardQueue and backwardQueue[0][0] < best[0]:
+                best = self.search(self.backwardUp, backwardCosts, backwardParents, backwardQueue, forwardCosts, best)
+            else:
+                backwardQueue = []
+
+        meeting = best[1]
+        if meeting is None:
+            return None
+
+        upward = []
+        pos = meeting
+        while forwardParents[pos] is not None:
+            upward.append((forwardParents[pos], pos))
+            pos = forwardParents[pos]
+        path = [initial]
+        for u, w in reversed(upward):
+            path.extend(self.unpack(u, w))
+        pos = meeting
+        while backwardParents[pos] is not None:
+            path.extend(self.unpack(pos, backwardParents[pos]))
+            pos = backwardParents[pos]
+        return path
+
+    def save(self, filename):
+        """Guarda la jerarquía en disco"""
+        with open(filename, "wb") as file:
+            pickle.dump((self.fingerprint, self.rank, self.forwardUp, self.backwardUp, self.middle), file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename, graph=None):
+        """
+        Carga una jerarquía guardada con save.
+
+        Params:
+            filename (str): El archivo de la jerarquía.
+            graph (dict): Si se indica, se verifica que la jerarquía se haya construido con este grafo.
+
+        Returns:
+            ContractionHierarchy: La jerarquía, o None si el archivo es de otro grafo (o de una versión
+                anterior sin huella).
+        """
+        hierarchy = cls()
+        with open(filename, "rb") as file:
+            data = pickle.load(file)
+        if len(data) != 5:
+            return None
+        hierarchy.fingerprint, hierarchy.rank, hierarchy.forwardUp, hierarchy.backwardUp, hierarchy.middle = data
+        if graph is not None and hierarchy.fingerprint != graphFingerprint(graph):
+            return None
+        return hierarchy
@@ -5,55 +5,244 @@
 #       A01750338 Min Che Kim				
 #       A01750911 Yael Michel García López		
 # Fecha de creación: 20/11/2024
-# Última modificación: 22/11/2024
+# Última modificación: 19/10/2026
 
-import mesa
-from model3 import CityModel
-from flask import Flask, jsonify
-from agents3 import Car
+import gzip, os, threading, time
 
 port = 8000
 
-app = Flask(__name__, static_url_path='')
-
-# Crea una instancia del modelo CityModel
-cityModel = CityModel(
-    numCars = 2,
-    gridWidth = 24,
-    gridHeight = 24,
-    startParkings = [1,2],
-    endParkings = [2,3]
-    )
-
-# Define la ruta GET (raíz)
-@app.route('/', methods=['GET'])
-def index():
-    return jsonify({"mesage": "Hello world from CityModel"})
-
-# Define la ruta GET / POST para obtener las posiciones de los autos
-@app.route('/positions', methods=['GET', 'POST'])
-def positions():
-    carPaths = []
-
-    for car in cityModel.schedule.agents:
-        if isinstance(car, Car):
-            carPaths.append({
-                # f"path_{car.unique_id}": [{"x": pos[0], "z": pos[1]} for pos in car.getPath()]
-                # })
-                f"path": [{"x": pos[0], "z": pos[1]} for pos in car.getPath()]
-                })
-    
-    return jsonify({"carPaths": carPaths})
-
-# Define la ruta GET /path/<carId> para obtener la ruta de un auto específico
-@app.route('/path/<int:carId>', methods=['GET'])
-def getCarPath(carId):
-    for car in cityModel.schedule.agents:
-        if isinstance(car, Car) and car.unique_id == carId:
-            carPath = [{"x": pos[0], "z": pos[1]} for pos in car.getPath()]
-            return jsonify({f"path_{car.unique_id}": carPath})
-    return jsonify({"error": "Car not found"}), 404
+# Máximo de autos por consulta en lote y tamaño mínimo (bytes) para comprimir una respuesta
+maxBatch = 1000
+minCompressSize = 500
 
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=port, debug=True)
+# Parámetros del modelo; el modelo se construye con la primera petición (ver getModel)
+modelParams = {
+    "numCars": 2,
+    "gridWidth": 24,
+    "gridHeight": 24,
+    "startParkings": [1, 2],
+    "endParkings": [2, 3]
+}
+
+cityModel = None
+modelLock = threading.Lock()
+
+def fleetParams(numCars, numParkings=17):
+    """
+    Parámetros del modelo para una flota de numCars autos repartidos entre todos los estacionamientos.
+
+    Params:
+        numCars (int): Número de autos.
+        numParkings (int): Número de estacionamientos del mapa.
+
+    Returns:
+        dict: Parámetros para CityModel.
+    """
+    return {
+        "numCars": numCars,
+        "gridWidth": 24,
+        "gridHeight": 24,
+        "startParkings": [i % numParkings + 1 for i in range(numCars)],
+        "endParkings": [(i + numParkings // 2) % numParkings + 1 for i in range(numCars)]
+    }
+
+def runTicker(model, tickRate):
+    """Avanza el modelo tickRate pasos por segundo mientras siga corriendo"""
+    while model.running:
+        start = time.perf_counter()
+        model.step()
+        time.sleep(max(0, 1 / tickRate - (time.perf_counter() - start)))
+
+def getModel():
+    """
+    Regresa la instancia de CityModel del servidor, creándola la primera vez.
+    Las rutas de los autos se calculan en segundo plano o cuando se piden.
+
+    Variables de entorno opcionales:
+        CITY_NUM_CARS: tamaño de la flota (en lugar de modelParams).
+        CITY_TICK_RATE: pasos por segundo con los que el servidor avanza el modelo en segundo plano.
+    """
+    global cityModel
+    if cityModel is None:
+        with modelLock:
+            if cityModel is None:
+                from model3 import CityModel
+                params = modelParams
+                if os.environ.get("CITY_NUM_CARS"):
+                    params = fleetParams(int(os.environ["CITY_NUM_CARS"]))
+                model = CityModel(**params)
+                model.precomputePaths()
+                tickRate = float(os.environ.get("CITY_TICK_RATE", 0))
+                if tickRate > 0:
+                    threading.Thread(target=runTicker, args=(model, tickRate), daemon=True).start()
+                cityModel = model
+    return cityModel
+
+def pathToJson(car):
+    """Convierte la ruta de un auto a una lista de {x, z}; un auto estacionado tiene ruta vacía"""
+    return [{"x": pos[0], "z": pos[1]} for pos in car.getPath() or []]
+
+def cellToJson(pos):
+    """
+    Convierte una celda a {x, z}. Recibe la celda ya leída del auto para leerla una sola vez:
+    el ticker puede mover el auto mientras se arma la respuesta.
+    """
+    return {"x": pos[0], "z": pos[1]} if pos is not None else None
+
+# Campos que se pueden pedir en /positions
+carFields = {
+    "id": lambda car: car.unique_id,
+    "path": pathToJson,
+    "pos": lambda car: cellToJson(car.pos),
+    "dest": lambda car: cellToJson(car.dest),
+    "parked": lambda car: car.parked
+}
+
+def parseIds(text):
+    """
+    Convierte una lista de ids y rangos ("1,2,10-20") en una lista de enteros.
+
+    Returns:
+        list: Los ids, o None si el texto no es válido o pide demasiados autos.
+    """
+    ids = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        if not first.isdigit() or (last and not last.isdigit()):
+            return None
+        first = int(first)
+        last = int(last) if last else first
+        if last < first or len(ids) + last - first + 1 > maxBatch:
+            return None
+        ids.extend(range(first, last + 1))
+    return ids
+
+def jsonIds(body):
+    """
+    Convierte el cuerpo JSON de /paths ({"ids": [1, 2, "10-20"]}) al formato de texto de parseIds.
+
+    Returns:
+        str: Los ids separados por comas, o None si el cuerpo no es válido.
+    """
+    if not isinstance(body, dict) or not isinstance(body.get("ids"), list):
+        return None
+    parts = []
+    for carId in body["ids"]:
+        if isinstance(carId, int) and not isinstance(carId, bool):
+            parts.append(str(carId))
+        elif isinstance(carId, str) and "," not in carId:
+            parts.append(carId)
+        else:
+            return None
+    return ",".join(parts)
 
+def acceptedEncodings(header):
+    """Regresa las codificaciones aceptadas por el cliente (sin las que tienen q=0)"""
+    encodings = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if coding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(coding.lower())
+    return encodings
+
+# Crea la aplicación de Flask. Flask y el modelo se importan hasta que se necesitan, así que
+# importar este archivo es inmediato. El nombre create_app es el que busca "flask --app server".
+def create_app():
+    from flask import Flask, jsonify, request
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+
+    app = Flask(__name__, static_url_path='')
+
+    # Comprime las respuestas JSON con zstd o gzip si el cliente lo acepta
+    @app.after_request
+    def compress(response):
+        if (response.direct_passthrough or response.status_code < 200 or response.status_code >= 300
+                or "Content-Encoding" in response.headers or response.mimetype != "application/json"):
+            return response
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        if len(data) < minCompressSize:
+            return response
+
+        encodings = acceptedEncodings(request.headers.get("Accept-Encoding", ""))
+        if zstandard is not None and "zstd" in encodings:
+            response.set_data(zstandard.ZstdCompressor().compress(data))
+            response.headers["Content-Encoding"] = "zstd"
+        elif "gzip" in encodings:
+            response.set_data(gzip.compress(data, compresslevel=5))
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    # Define la ruta GET (raíz)
+    @app.route('/', methods=['GET'])
+    def index():
+        return jsonify({"mesage": "Hello world from CityModel"})
+
+    # Define la ruta GET / POST para obtener las posiciones de los autos
+    # Parámetros opcionales: offset y limit (paginación) y fields (por ejemplo fields=id,pos)
+    @app.route('/positions', methods=['GET', 'POST'])
+    def positions():
+        fields = request.args.get("fields", "path").split(",")
+        if any(field not in carFields for field in fields):
+            return jsonify({"error": f"Unknown field; valid fields: {', '.join(carFields)}"}), 400
+
+        cars = list(getModel().cars.values())
+        paged = "offset" in request.args or "limit" in request.args
+        try:
+            offset = int(request.args.get("offset", 0))
+            limit = int(request.args.get("limit", len(cars)))
+        except ValueError:
+            offset = limit = -1
+        if offset < 0 or limit < 0:
+            return jsonify({"error": "offset and limit must be non-negative integers"}), 400
+
+        carPaths = []
+        for car in cars[offset:offset + limit]:
+            carPaths.append({field: carFields[field](car) for field in fields})
+
+        response = {"carPaths": carPaths}
+        if paged:
+            response.update({"offset": offset, "limit": limit, "total": len(cars)})
+        return jsonify(response)
+
+    # Define la ruta GET /path/<carId> para obtener la ruta de un auto específico
+    @app.route('/path/<int:carId>', methods=['GET'])
+    def getCarPath(carId):
+        car = getModel().cars.get(carId)
+        if car is None:
+            return jsonify({"error": "Car not found"}), 404
+        return jsonify({f"path_{car.unique_id}": pathToJson(car)})
+
+    # Define la ruta GET / POST /paths para obtener las rutas de varios autos (ids=1,2,10-20)
+    @app.route('/paths', methods=['GET', 'POST'])
+    def getCarPaths():
+        if "ids" not in request.args and request.is_json:
+            text = jsonIds(request.get_json(silent=True))
+        else:
+            text = request.args.get("ids", "")
+        ids = parseIds(text) if text is not None else None
+        if ids is None:
+            return jsonify({"error": f"Invalid ids (use 1,2,10-20; at most {maxBatch} cars)"}), 400
+
+        cars = getModel().cars
+        paths = {}
+        missing = []
+        for carId in ids:
+            car = cars.get(carId)
+            if car is None:
+                missing.append(carId)
+            else:
+                paths[f"path_{carId}"] = pathToJson(car)
+        return jsonify({"paths": paths, "missing": missing})
+
+    return app
+
+if __name__ == '__main__':
+    create_app().run(host='0.0.0.0', port=port, debug=True)
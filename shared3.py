@@ -0,0 +1,244 @@
+# Este archivo contiene los datos estáticos de la ciudad compartidos entre procesos.
+# Un proceso publica una sola vez el grafo de calles, la alcanzabilidad y las rutas entre
+# estacionamientos en memoria compartida; los modelos de los demás procesos solo la leen.
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import pickle, struct
+from collections.abc import Mapping
+from multiprocessing import resource_tracker, shared_memory
+from graph3 import moves, shortestPath
+
+# Bits de la cuadrícula de direcciones: uno por movimiento y uno que indica que la celda está en el grafo
+directionBits = {"up": 1, "down": 2, "left": 4, "right": 8}
+nodeBit = 16
+# Ancho, alto, número de estacionamientos, celdas de todas las rutas y tamaño de los metadatos
+header = struct.Struct("<IIIIQ")
+
+def sections(width, height, numParkings, routeCells):
+    """
+    Calcula dónde empieza cada sección del bloque: grafo (un byte por celda), componentes, offsets de
+    las rutas y celdas de las rutas (enteros de 4 bytes alineados) y metadatos.
+
+    Returns:
+        tuple: Inicio del grafo, de las componentes, de los offsets, de las rutas y de los metadatos.
+    """
+    cells = width * height
+    graphStart = header.size
+    componentsStart = graphStart + cells + (-(graphStart + cells) % 4)
+    offsetsStart = componentsStart + 4 * cells
+    routesStart = offsetsStart + 4 * (numParkings * numParkings + 1)
+    metaStart = routesStart + 4 * routeCells
+    return graphStart, componentsStart, offsetsStart, routesStart, metaStart
+
+class RasterGraph(Mapping):
+    """
+    Grafo de calles de solo lectura guardado como una cuadrícula de bytes (un bit por dirección).
+    Se usa igual que el diccionario de compileGraph.
+    """
+
+    def __init__(self, raster, width, height) -> None:
+        self.raster = raster
+        self.width = width
+        self.height = height
+
+    def __getitem__(self, pos):
+        x, y = pos
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise KeyError(pos)
+        bits = self.raster[x * self.height + y]
+        if not bits & nodeBit:
+            raise KeyError(pos)
+        return tuple((x + dx, y + dy) for direc, (dx, dy) in moves.items() if bits & directionBits[direc])
+
+    def __iter__(self):
+        for i, bits in enumerate(self.raster):
+            if bits & nodeBit:
+                yield divmod(i, self.height)
+
+    def __len__(self):
+        return sum(1 for bits in self.raster if bits & nodeBit)
+
+class RasterComponents(Mapping):
+    """Componente fuertemente conexa de cada celda, guardada como cuadrícula de enteros (-1 si no está en el grafo)"""
+
+    def __init__(self, raster, width, height) -> None:
+        self.raster = raster
+        self.width = width
+        self.height = height
+
+    def __getitem__(self, pos):
+        x, y = pos
+        if not (0 <= x < self.width and 0 <= y < self.height) or self.raster[x * self.height + y] < 0:
+            raise KeyError(pos)
+        return self.raster[x * self.height + y]
+
+    def __iter__(self):
+        for i, comp in enumerate(self.raster):
+            if comp >= 0:
+                yield divmod(i, self.height)
+
+    def __len__(self):
+        return sum(1 for comp in self.raster if comp >= 0)
+
+class RasterRoutes(Mapping):
+    """
+    Rutas de solo lectura entre estacionamientos: (origen, destino) -> tupla de celdas.
+    Las celdas de todas las rutas están en un solo arreglo de enteros y offsets indica dónde empieza
+    cada una (la ruta del estacionamiento i al j ocupa offsets[i * n + j]:offsets[i * n + j + 1]).
+    """
+
+    def __init__(self, offsets, cells, parkingsPos, height) -> None:
+        self.offsets = offsets
+        self.cells = cells
+        self.parkingsPos = parkingsPos
+        self.index = {pos: i for i, pos in enumerate(parkingsPos)}
+        self.height = height
+
+    def span(self, start, end):
+        """Regresa el inicio y el fin de la ruta en cells (iguales si no hay ruta)"""
+        k = start * len(self.parkingsPos) + end
+        return self.offsets[k], self.offsets[k + 1]
+
+    def __getitem__(self, key):
+        start, end = key
+        if start not in self.index or end not in self.index:
+            raise KeyError(key)
+        first, last = self.span(self.index[start], self.index[end])
+        if first == last:
+            raise KeyError(key)
+        return tuple(divmod(cell, self.height) for cell in self.cells[first:last].tolist())
+
+    def __iter__(self):
+        for i, start in enumerate(self.parkingsPos):
+            for j, end in enumerate(self.parkingsPos):
+                first, last = self.span(i, j)
+                if first != last:
+                    yield (start, end)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+class SharedCityData:
+    """
+    Datos estáticos de la ciudad en un bloque de memoria compartida.
+
+    Uso:
+        data = SharedCityData.publish(model)            # proceso principal
+        data = SharedCityData.attach(name)              # en cada proceso de trabajo
+        model = CityModel(..., cityData=data)
+    """
+
+    def __init__(self, memory, owner) -> None:
+        """
+        Params:
+            memory (SharedMemory): El bloque de memoria compartida.
+            owner (bool): True si este proceso creó el bloque (y debe liberarlo con unlink).
+        """
+        self.memory = memory
+        self.owner = owner
+        self.name = memory.name
+        width, height, numParkings, routeCells, metaSize = header.unpack_from(memory.buf, 0)
+        cells = width * height
+        graphStart, componentsStart, offsetsStart, routesStart, metaStart = sections(width, height, numParkings, routeCells)
+        view = memory.buf.toreadonly()
+        self.views = [view]
+        self.width = width
+        self.height = height
+        self.views += [view[graphStart:graphStart + cells], view[componentsStart:offsetsStart],
+                       view[offsetsStart:routesStart], view[routesStart:metaStart]]
+        self.views += [self.views[2].cast("i"), self.views[3].cast("I"), self.views[4].cast("i")]
+        # Solo los datos pequeños (alcanzabilidad y posiciones de los estacionamientos) se copian al adjuntarse
+        self.meta = pickle.loads(view[metaStart:metaStart + metaSize])
+        self.graph = RasterGraph(self.views[1], width, height)
+        self.components = RasterComponents(self.views[5], width, height)
+        self.routes = RasterRoutes(self.views[6], self.views[7], self.meta["parkingsPos"], height)
+
+    @classmethod
+    def publish(cls, model, name=None):
+        """
+        Publica los datos estáticos de un modelo en memoria compartida.
+
+        Params:
+            model (CityModel): Modelo ya construido del que se toman los datos.
+            name (str): Nombre del bloque (por omisión lo elige el sistema).
+
+        Returns:
+            SharedCityData: Los datos publicados; el bloque vive hasta llamar a unlink.
+        """
+        width, height = model.grid.width, model.grid.height
+        cells = width * height
+        graphRaster = bytearray(cells)
+        for pos, neighbors in model.graph.items():
+            if not (0 <= pos[0] < width and 0 <= pos[1] < height):
+                raise ValueError(f"La celda {pos} está fuera de la cuadrícula")
+            bits = nodeBit
+            for newPos in neighbors:
+                delta = (newPos[0] - pos[0], newPos[1] - pos[1])
+                bits |= next(directionBits[direc] for direc, move in moves.items() if move == delta)
+            graphRaster[pos[0] * height + pos[1]] = bits
+        components = [-1] * cells
+        for (x, y), comp in model.components.items():
+            components[x * height + y] = comp
+
+        numParkings = len(model.parkingsPos)
+        offsets = [0]
+        routeCells = []
+        for start in model.parkingsPos:
+            for end in model.parkingsPos:
+                if start != end and model.canReach(start, end):
+                    routeCells += [x * height + y for x, y in shortestPath(model.graph, start, end)]
+                offsets.append(len(routeCells))
+        meta = pickle.dumps({
+            "parkingsPos": model.parkingsPos,
+            "reach": model.reach
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        graphStart, componentsStart, offsetsStart, routesStart, metaStart = sections(width, height, numParkings, len(routeCells))
+        memory = shared_memory.SharedMemory(name=name, create=True, size=metaStart + len(meta))
+        header.pack_into(memory.buf, 0, width, height, numParkings, len(routeCells), len(meta))
+        memory.buf[graphStart:graphStart + cells] = graphRaster
+        memory.buf[componentsStart:offsetsStart] = struct.pack(f"{cells}i", *components)
+        memory.buf[offsetsStart:routesStart] = struct.pack(f"{len(offsets)}I", *offsets)
+        memory.buf[routesStart:metaStart] = struct.pack(f"{len(routeCells)}i", *routeCells)
+        memory.buf[metaStart:metaStart + len(meta)] = meta
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Se adjunta, en modo de solo lectura, a datos publicados por otro proceso.
+
+        Params:
+            name (str): Nombre del bloque de memoria compartida.
+
+        Returns:
+            SharedCityData: Los datos compartidos.
+        """
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Antes de Python 3.13 el bloque se registra al adjuntarse y se borraría al salir el proceso
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                memory = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        return cls(memory, owner=False)
+
+    def close(self):
+        """Libera las vistas de este proceso sobre el bloque (los modelos que las usan deben descartarse antes)"""
+        for view in reversed(self.views):
+            view.release()
+        self.memory.close()
+
+    def unlink(self):
+        """Destruye el bloque de memoria compartida (solo el proceso que lo publicó)"""
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,87 @@
+# Este archivo contiene el calendarizador síncrono de la simulación de la ciudad.
+# Cada paso tiene dos fases: todos los autos proponen su movimiento y después se resuelven los
+# conflictos con una regla de prioridad fija y se aplican todos los movimientos a la vez.
+# Autores:
+#       A01749581 Mariana Balderrábano Aguilar
+#       A01749898 Jennyfer Nahomi Jasso Hernández
+#       A01750338 Min Che Kim
+#       A01750911 Yael Michel García López
+# Fecha de creación: 19/10/2026
+# Última modificación: 19/10/2026
+
+import mesa
+from agents3 import Car
+
+class SynchronousActivation(mesa.time.BaseScheduler):
+    """
+    Calendarizador en dos fases. El resultado no depende del orden de activación: la fase de
+    propuestas solo lee el estado del modelo, por lo que puede repartirse entre hilos o procesos.
+    """
+
+    def resolve(self, proposals):
+        """
+        Decide qué movimientos se aplican. Gana la celda el auto con menor identificador y un auto
+        solo avanza si la celda queda libre: está vacía o quien la ocupa también avanza. Como en el
+        modo secuencial, los autos no pueden intercambiar celdas ni avanzar en círculo (rotaciones):
+        cada cadena de movimientos debe terminar en una celda vacía.
+
+        Params:
+            proposals (list): Lista de (auto, celda) ordenada por prioridad.
+
+        Returns:
+            list: Los movimientos (auto, celda) que se aplican.
+        """
+        claimed = {}
+        for car, nextPos in proposals:
+            claimed.setdefault(nextPos, car)
+        movers = {car: nextPos for nextPos, car in claimed.items()}
+
+        occupants = {}
+        for car in self.model.cars.values():
+            if car.pos is not None:
+                occupants.setdefault(car.pos, []).append(car)
+
+        # Se aceptan primero los autos que van a una celda vacía y después, hacia atrás, los que van a
+        # una celda cuyos ocupantes ya se aceptaron. Los ciclos nunca llegan a aceptarse.
+        accepted = set()
+        changed = True
+        while changed:
+            changed = False
+            for car, nextPos in movers.items():
+                if car not in accepted and all(other in accepted for other in occupants.get(nextPos, ())):
+                    accepted.add(car)
+                    changed = True
+        return [(car, nextPos) for car, nextPos in proposals if car in accepted and movers[car] == nextPos]
+
+    def step(self):
+        """
+        Fase 1: cada auto propone su movimiento. Fase 2: los autos que llegan a su destino se estacionan
+        en orden de prioridad y después se aplican, a la vez, los movimientos sin conflicto.
+        """
+        agents = sorted(self.agents, key=lambda a: (type(a).__name__, a.unique_id))
+        cars = [agent for agent in agents if isinstance(agent, Car)]
+        for agent in agents:
+            if not isinstance(agent, Car):
+                agent.step()
+
+        proposals = [(car, car.propose()) for car in cars]
+        moves = []
+        for car, proposal in proposals:
+            if proposal is None:
+                continue
+            action, nextPos = proposal
+            if action == "park":
+                car.park()
+            else:
+                moves.append((car, nextPos))
+
+        accepted = self.resolve(moves)
+        acceptedCars = {car for car, _ in accepted}
+        for car, nextPos in moves:
+            if car not in acceptedCars:
+                car.waiting = True
+        # La ocupación ya se resolvió: el orden en que se aplican los movimientos no cambia el resultado
+        for car, nextPos in accepted:
+            car.commitMove(nextPos)
+        self.steps += 1
+        self.time += 1